@@ -6,6 +6,7 @@ from model.train import AutoGluonModel
 import pandas as pd
 
 from model.utils import compute_targets
+from model.backtest import backtest
 
 
 @click.command()
@@ -15,7 +16,11 @@ from model.utils import compute_targets
 @click.option('--predict', is_flag=True, help='Flag to call the predict method')
 @click.option('--fit_predict', is_flag=True, help='Flag to call the fit_predict method')
 @click.option('--preprocessing', is_flag=True, help='Flag to call the preprocessing')
-def main(file_path, second_file_path, fit, predict, fit_predict, preprocessing):
+@click.option('--backtest', 'run_backtest', is_flag=True, help='Flag to call the rolling-origin backtest')
+@click.option('--cutoff', multiple=True, help='Cutoff date YYYY-MM-DD for --backtest, can be repeated')
+@click.option('--time_limit', type=int, default=600, show_default=True, help='Time limit in seconds to fit one --backtest fold')
+@click.option('--n_jobs', type=int, default=2, show_default=True, help='Number of --backtest folds fitted in parallel')
+def main(file_path, second_file_path, fit, predict, fit_predict, preprocessing, run_backtest, cutoff, time_limit, n_jobs):
     model = AutoGluonModel()
 
     if fit_predict:
@@ -54,8 +59,18 @@ def main(file_path, second_file_path, fit, predict, fit_predict, preprocessing):
         compute_targets(folder_path=file_path)
         click.echo("the files have been processed successfully. Look computing_target_data.csv")
 
+    elif run_backtest:
+        if not cutoff:
+            click.echo("Error: --backtest requires at least one --cutoff date")
+            return
+
+        report = backtest(folder_path=file_path, cutoff_dates=cutoff, time_limit=time_limit, n_jobs=n_jobs)
+        report.to_csv('backtest_report.csv', index=False)
+        click.echo(report)
+        click.echo("Backtest completed. Results saved to 'backtest_report.csv'")
+
     else:
-        click.echo("No valid flag provided. Please use --fit, --predict, or --fit_predict.")
+        click.echo("No valid flag provided. Please use --fit, --predict, --fit_predict, --preprocessing or --backtest.")
 
 
 if __name__ == "__main__":
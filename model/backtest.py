@@ -0,0 +1,184 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+from tqdm import tqdm
+
+from model.train import AutoGluonModel
+from model.utils import load_existing_output, update_features, update_smart_features
+
+# Горизонт прогноза глобальной модели: 12 месяцев по 30 дней
+HORIZON_DAYS = 360
+
+
+def collect_snapshots(folder_path: str, cutoff_dates, feature_file_path=None, THRESH_NA: float = 0.5):
+    """
+    Один раз проходит по ежедневным файлам и снимает состояние расчёта таргетов на каждую дату отсечения.
+
+    Параметры:
+    folder_path (str): Путь к папке с CSV файлами вида YYYY-MM-DD.csv.
+    cutoff_dates (list): Даты отсечения (строки или datetime).
+    feature_file_path (str): Путь к CSV файлу с существующими данными (опционально).
+    THRESH_NA (float): Порог для удаления столбцов с пропущенными значениями, как в AutoGluonModel.fit.
+
+    Возвращает:
+    snapshots (dict): дата отсечения -> (train_df, test_df), где train_df совпадает с результатом
+        compute_targets по файлам до даты отсечения включительно (с числовыми типами, как после чтения из CSV,
+        и без столбцов, которые fit всё равно удалит), а test_df - наблюдения исправных дисков за эту дату.
+    failure_dates (dict): serial_number -> дата первого отказа диска.
+    """
+    cutoffs = {pd.Timestamp(date) for date in cutoff_dates}
+
+    # Загружаем существующий выходной DataFrame
+    output_new_df = load_existing_output(feature_file_path)
+
+    # Файлы обрабатываем строго в хронологическом порядке
+    csv_files = sorted(file for file in os.listdir(folder_path) if file.endswith('.csv'))
+    if not csv_files:
+        raise ValueError(f"В папке {folder_path} нет CSV файлов")
+
+    # Для каждой даты отсечения нужны данные за 12 месяцев (360 дней, как в predict_global_model) после неё,
+    # иначе фактических отказов в дальних интервалах окажется меньше реального
+    last_date = pd.Timestamp(os.path.splitext(csv_files[-1])[0])
+    short_cutoffs = [date for date in cutoffs if date + pd.Timedelta(days=HORIZON_DAYS) > last_date]
+    if short_cutoffs:
+        raise ValueError(
+            f"Меньше {HORIZON_DAYS} дней данных после дат отсечения {sorted(str(date.date()) for date in short_cutoffs)}, "
+            f"последний файл за {last_date.date()}"
+        )
+
+    snapshots = {}
+    failure_dates = {}
+    for csv_data in tqdm(csv_files, desc="Обработка файлов"):
+        file_date = pd.Timestamp(os.path.splitext(csv_data)[0])
+        new_df = pd.read_csv(os.path.join(folder_path, csv_data))
+
+        # Запоминаем дату первого отказа каждого диска
+        for serial in new_df.loc[new_df['failure'] == 1, 'serial_number']:
+            failure_dates.setdefault(serial, file_date)
+
+        if file_date in cutoffs:
+            # Снимок: файл за дату отсечения обрабатывается как последний, как это сделал бы compute_targets
+            snapshot_df = output_new_df.copy()
+            snapshot_df = update_features(new_df.copy(), snapshot_df, is_last_file=True)
+            # Новые диски в последнем файле не добавляются, поэтому SMART обновляем только для известных дисков
+            known_df = new_df[new_df['serial_number'].isin(snapshot_df.index)]
+            snapshot_df = update_smart_features(known_df.copy(), snapshot_df)
+            test_df = new_df[new_df['failure'] == 0].drop(columns=['failure'])
+            snapshots[file_date] = (_compact_snapshot(snapshot_df, THRESH_NA), test_df)
+
+        # Обновляем основное состояние
+        output_new_df = update_features(new_df, output_new_df)
+        output_new_df = update_smart_features(new_df, output_new_df)
+
+    missing_cutoffs = cutoffs - set(snapshots)
+    if missing_cutoffs:
+        raise ValueError(f"Нет файлов за даты отсечения: {sorted(str(date.date()) for date in missing_cutoffs)}")
+
+    return snapshots, failure_dates
+
+
+def _compact_snapshot(snapshot_df: pd.DataFrame, THRESH_NA: float) -> pd.DataFrame:
+    # Состояние собирается из пустого DataFrame, поэтому все столбцы имеют тип object.
+    # Приводим к числовым типам, как после чтения computing_target_data.csv, и сразу удаляем
+    # столбцы с долей пропусков не ниже THRESH_NA, чтобы снимки занимали меньше памяти
+    snapshot_df = snapshot_df.loc[:, snapshot_df.isnull().mean() < THRESH_NA]
+    snapshot_df = snapshot_df.reset_index(names='serial_number')
+    numeric_columns = [col for col in snapshot_df.columns if col not in ('serial_number', 'model')]
+    snapshot_df[numeric_columns] = snapshot_df[numeric_columns].apply(pd.to_numeric)
+    return snapshot_df
+
+
+def actual_global_counts(test_df: pd.DataFrame, failure_dates: dict, cutoff) -> pd.DataFrame:
+    """
+    Считает фактическое количество отказов по интервалам 0-3/4-6/7-9/10-12 месяцев после даты отсечения.
+
+    Параметры:
+    test_df (pd.DataFrame): Исправные диски на дату отсечения.
+    failure_dates (dict): serial_number -> дата первого отказа диска.
+    cutoff: Дата отсечения.
+
+    Возвращает:
+    pd.DataFrame: Таблица в формате predict_global_model.
+    """
+    actual_local = test_df[['serial_number', 'model', 'capacity_bytes']].copy()
+    failure_date = pd.to_datetime(actual_local['serial_number'].map(failure_dates))
+    # Диски без отказа после даты отсечения не попадают ни в один интервал
+    actual_local['predicted_days_to_failure'] = (failure_date - pd.Timestamp(cutoff)).dt.days
+    actual_local = actual_local[actual_local['predicted_days_to_failure'] > 0]
+    return AutoGluonModel().predict_global_model(actual_local)
+
+
+def _run_fold(cutoff, train_df, test_df, save_path_model, time_limit, THRESH_NA, num_cpus):
+    # Обучение и предсказание одного фолда, выполняется в отдельном процессе
+    model = AutoGluonModel()
+    model.fit(train_df, save_path_model=save_path_model, time_limit=time_limit, THRESH_NA=THRESH_NA, num_cpus=num_cpus)
+    # Фолды работают параллельно, поэтому локальные предсказания в CSV не сохраняем
+    local_predict_data = model.predict_local_model(test_df, save_path_model=save_path_model, output_path=None)
+    return cutoff, model.predict_global_model(local_predict_data)
+
+
+def count_errors(predicted: pd.DataFrame, actual: pd.DataFrame) -> pd.DataFrame:
+    """
+    Сравнивает предсказанное и фактическое количество отказов по интервалам.
+
+    Возвращает DataFrame с суммарными количествами и ошибками по каждому временному интервалу.
+    """
+    keys = ['capacity_bytes', 'model', 'time_interval']
+    merged = pd.merge(
+        predicted[keys + ['disk_count']].astype({'time_interval': str}),
+        actual[keys + ['disk_count']].astype({'time_interval': str}),
+        on=keys, how='outer', suffixes=('_predicted', '_actual'),
+    ).fillna({'disk_count_predicted': 0, 'disk_count_actual': 0})
+    merged['abs_count_error'] = (merged['disk_count_predicted'] - merged['disk_count_actual']).abs()
+
+    interval_order = ['0-3 месяца', '4-6 месяцев', '7-9 месяцев', '10-12 месяцев']
+    result = merged.groupby('time_interval').agg(
+        predicted_count=('disk_count_predicted', 'sum'),
+        actual_count=('disk_count_actual', 'sum'),
+        abs_count_error=('abs_count_error', 'sum'),
+    ).reindex(interval_order, fill_value=0)
+    result['count_error'] = result['predicted_count'] - result['actual_count']
+    return result.reset_index(names='time_interval')
+
+
+def backtest(folder_path: str, cutoff_dates, feature_file_path=None, save_path_model: str = 'backtest_models',
+             time_limit: int = 30, THRESH_NA: float = 0.5, n_jobs: int = 2) -> pd.DataFrame:
+    """
+    Бэктест глобальной модели со скользящей датой отсечения.
+
+    Ежедневные файлы обрабатываются один раз, для каждой даты отсечения из снимка состояния строятся
+    обучающая выборка и фактические отказы, фолды обучаются параллельно.
+    Аргументы:
+    - folder_path: путь к папке с ежедневными CSV файлами
+    - cutoff_dates: даты отсечения, для каждой нужно 360 дней данных после неё, иначе ValueError
+    - feature_file_path: путь к CSV файлу с существующими данными (опционально)
+    - save_path_model: папка, в которой сохраняются модели фолдов (по умолчанию 'backtest_models')
+    - time_limit: ограничение по времени для обучения одного фолда в секундах (по умолчанию 30)
+    - THRESH_NA: порог для удаления столбцов с пропущенными значениями (по умолчанию 0.5)
+    - n_jobs: количество параллельно обучаемых фолдов, ядра делятся между ними поровну (по умолчанию 2)
+
+    Возвращает DataFrame с ошибками количества отказов по каждой дате отсечения и временному интервалу.
+    """
+    snapshots, failure_dates = collect_snapshots(folder_path, cutoff_dates, feature_file_path, THRESH_NA)
+
+    # Каждый фолд обучается с bagging и сам занимает все выделенные ему ядра
+    num_cpus = max(1, (os.cpu_count() or 1) // n_jobs)
+
+    reports = []
+    with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+        futures = [
+            executor.submit(
+                _run_fold, cutoff, train_df, test_df,
+                os.path.join(save_path_model, cutoff.strftime('%Y-%m-%d')), time_limit, THRESH_NA, num_cpus,
+            )
+            for cutoff, (train_df, test_df) in snapshots.items()
+        ]
+        for future in futures:
+            cutoff, predicted = future.result()
+            actual = actual_global_counts(snapshots[cutoff][1], failure_dates, cutoff)
+            report = count_errors(predicted, actual)
+            report.insert(0, 'cutoff', cutoff.strftime('%Y-%m-%d'))
+            reports.append(report)
+
+    return pd.concat(reports, ignore_index=True)
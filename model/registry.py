@@ -0,0 +1,128 @@
+import os
+import shutil
+import threading
+from datetime import datetime
+
+from autogluon.tabular import TabularPredictor
+
+VERSIONS_DIR = 'versions'
+CURRENT_FILE = 'CURRENT'
+
+
+def new_version_path(folder_path: str) -> str:
+    """
+    Возвращает путь к новой версии модели внутри папки folder_path.
+
+    Имя версии - отметка времени, поэтому версии сортируются по времени создания.
+    """
+    version = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+    return os.path.join(folder_path, VERSIONS_DIR, version)
+
+
+def current_version(folder_path: str):
+    """
+    Возвращает имя текущей версии модели или None, если указатель ещё не создан.
+    """
+    current_path = os.path.join(folder_path, CURRENT_FILE)
+    if not os.path.exists(current_path):
+        return None
+    with open(current_path) as file:
+        return file.read().strip() or None
+
+
+def resolve_model_path(folder_path: str) -> str:
+    """
+    Возвращает путь к текущей версии модели.
+
+    Если указателя нет, считается, что модель лежит прямо в folder_path (старый формат папки).
+    """
+    version = current_version(folder_path)
+    if version is None:
+        return folder_path
+    return os.path.join(folder_path, VERSIONS_DIR, version)
+
+
+def promote_version(version_path: str) -> None:
+    """
+    Атомарно переключает указатель текущей версии на version_path.
+
+    Указатель сначала пишется во временный файл, затем заменяется через os.replace,
+    поэтому читающие процессы видят либо старую, либо новую версию целиком.
+    """
+    folder_path = os.path.dirname(os.path.dirname(version_path))
+    current_path = os.path.join(folder_path, CURRENT_FILE)
+    tmp_path = f'{current_path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as file:
+        file.write(os.path.basename(version_path))
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, current_path)
+
+
+def prune_versions(folder_path: str, keep_versions: int = 3) -> None:
+    """
+    Удаляет старые версии модели, оставляя keep_versions последних и всегда текущую.
+
+    ReloadingPredictor держит модели в памяти, поэтому удаление его версии с диска ему не мешает.
+    """
+    versions_path = os.path.join(folder_path, VERSIONS_DIR)
+    if not os.path.exists(versions_path):
+        return
+    current = current_version(folder_path)
+    versions = sorted(os.listdir(versions_path), reverse=True)
+    for version in versions[keep_versions:]:
+        if version != current:
+            shutil.rmtree(os.path.join(versions_path, version), ignore_errors=True)
+
+
+class ReloadingPredictor:
+    """
+    Держит текущую версию модели в памяти и подгружает новую в фоновом потоке.
+
+    Поток раз в poll_interval секунд проверяет указатель текущей версии. Модели новой версии
+    загружаются в память (persist без ограничения по памяти) и, если передан warmup_data, прогреваются
+    пробным предсказанием до подмены ссылки. Если модели не удалось загрузить в память, работает старая версия.
+    Поэтому predict не блокируется, не читает модели с диска и не зависит от удаления старых версий в prune_versions.
+    """
+
+    def __init__(self, folder_path: str = 'weights_model', poll_interval: float = 30, warmup_data=None):
+        self.folder_path = folder_path
+        self.poll_interval = poll_interval
+        self.warmup_data = warmup_data
+        self.version = current_version(folder_path)
+        self.predictor = self._load(self.version)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._watch, daemon=True)
+        self._thread.start()
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            version = current_version(self.folder_path)
+            if version is None or version == self.version:
+                continue
+            try:
+                predictor = self._load(version)
+            except Exception as e:
+                # Оставляем работать старую модель, повторим попытку на следующей проверке
+                print(f"Не удалось загрузить версию {version}: {e}")
+                continue
+            self.predictor, self.version = predictor, version
+            print(f"Загружена версия модели {version}")
+
+    def _load(self, version):
+        # Загружаем все модели в память, иначе AutoGluon читает их с диска при каждом predict
+        model_path = self.folder_path if version is None else os.path.join(self.folder_path, VERSIONS_DIR, version)
+        predictor = TabularPredictor.load(model_path)
+        # max_memory=None: иначе при нехватке памяти AutoGluon пропускает persist с предупреждением
+        if not predictor.persist(max_memory=None):
+            raise RuntimeError(f"Не удалось загрузить модели в память из {model_path}")
+        if self.warmup_data is not None:
+            predictor.predict(self.warmup_data)
+        return predictor
+
+    def predict(self, data):
+        return self.predictor.predict(data)
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
@@ -1,26 +1,24 @@
 import pandas as pd
 from autogluon.tabular import TabularPredictor
 import shutil
-import os
 
-# Функция для очистки папки перед сохранением новых моделей
-def clear_weights_folder(folder_path):
-    if os.path.exists(folder_path):
-        shutil.rmtree(folder_path)  # Удаляем старую папку вместе с файлами
-    os.makedirs(folder_path)  # Создаем пустую папку
+from model.registry import new_version_path, promote_version, prune_versions, resolve_model_path
 
 # Класс AutoGluonModel, который содержит методы для обучения, предсказания и агрегации результатов
 class AutoGluonModel:
 
     # Метод для обучения модели
-    def fit(self, train_data: pd.DataFrame, save_path_model: str = 'weights_model', time_limit: int = 30, THRESH_NA: float = 0.5) -> pd.DataFrame:
+    def fit(self, train_data: pd.DataFrame, save_path_model: str = 'weights_model', time_limit: int = 30, THRESH_NA: float = 0.5, keep_versions: int = 3, num_cpus='auto') -> pd.DataFrame:
         """
         Обучает модель с использованием AutoGluon.
+        Модель сохраняется в новую версию внутри save_path_model и становится текущей только после успешного обучения.
         Аргументы:
         - train_data: данные для обучения в формате DataFrame
         - save_path_model: путь для сохранения модели (по умолчанию 'weights_model')
         - time_limit: ограничение по времени для обучения модели в секундах (по умолчанию 600)
         - THRESH_NA: порог для удаления столбцов с пропущенными значениями (по умолчанию 0.5)
+        - keep_versions: сколько последних версий модели хранить (по умолчанию 3)
+        - num_cpus: количество ядер для обучения (по умолчанию 'auto' - все доступные)
 
         Возвращает таблицу с результатами лучшей модели (leaderboard).
         """
@@ -34,36 +32,47 @@ class AutoGluonModel:
             if hasattr(train_data[column], "sparse") and train_data[column].sparse is not None:
                 train_data[column] = train_data[column].sparse.to_dense()
 
-        # Очищаем папку с моделями перед сохранением новой
-        clear_weights_folder(save_path_model)
-
-        # Обучаем модель с AutoGluon
-        predictor = TabularPredictor(
-            label='hard_live_cost',  # Целевая переменная
-            problem_type='regression',  # Тип задачи - регрессия
-            eval_metric='mean_absolute_error',  # Метрика оценки модели
-            path=save_path_model,  # Путь для сохранения модели
-        ).fit(
-            train_data,
-            time_limit=time_limit,  # Ограничение по времени
-            presets='best_quality',  # Пресеты для качества модели
-            keep_only_best=True  # Сохраняем только лучшую модель
-        )
+        # Обучаем модель в новую версию, текущая модель остаётся доступной для предсказаний
+        version_path = new_version_path(save_path_model)
+        try:
+            predictor = TabularPredictor(
+                label='hard_live_cost',  # Целевая переменная
+                problem_type='regression',  # Тип задачи - регрессия
+                eval_metric='mean_absolute_error',  # Метрика оценки модели
+                path=version_path,  # Путь для сохранения модели
+            ).fit(
+                train_data,
+                time_limit=time_limit,  # Ограничение по времени
+                presets='best_quality',  # Пресеты для качества модели
+                keep_only_best=True,  # Сохраняем только лучшую модель
+                num_cpus=num_cpus,  # Количество ядер для обучения
+            )
+        except BaseException:
+            # Неудачное обучение не трогает текущую модель
+            shutil.rmtree(version_path, ignore_errors=True)
+            raise
+
+        # Переключаем указатель на новую версию и удаляем старые
+        promote_version(version_path)
+        prune_versions(save_path_model, keep_versions)
 
         # Возвращаем таблицу с результатами моделей (leaderboard)
         return predictor.leaderboard()
 
     # Метод для предсказания на локальной модели
-    def predict_local_model(self, data: pd.DataFrame, save_path_model: str = 'weights_model') -> pd.DataFrame:
+    def predict_local_model(self, data: pd.DataFrame, save_path_model: str = 'weights_model', predictor=None, output_path='local_predict_model.csv') -> pd.DataFrame:
         """
-        Загружает сохранённую модель и делает предсказания на новых данных.
+        Загружает текущую версию сохранённой модели и делает предсказания на новых данных.
         Аргументы:
         - data: входные данные в формате DataFrame
+        - save_path_model: путь к папке с моделью (по умолчанию 'weights_model')
+        - predictor: уже загруженная модель, например ReloadingPredictor (опционально)
+        - output_path: путь для сохранения предсказаний в CSV, None - не сохранять (по умолчанию 'local_predict_model.csv')
 
         Возвращает DataFrame с предсказанным количеством дней до выхода дисков из строя.
         """
-        # Загружаем сохранённую модель
-        loaded_predictor = TabularPredictor.load(save_path_model)
+        # Загружаем текущую версию сохранённой модели
+        loaded_predictor = predictor if predictor is not None else TabularPredictor.load(resolve_model_path(save_path_model))
 
         # Сохраняем столбец 'serial_number', затем удаляем ненужные столбцы
         s_number = data['serial_number']
@@ -76,7 +85,8 @@ class AutoGluonModel:
         data['predicted_days_to_failure'] = predictions
         data['serial_number'] = s_number
         predict_data = data[['serial_number', 'model', 'capacity_bytes', 'predicted_days_to_failure']]
-        predict_data.to_csv('local_predict_model.csv', index=False)
+        if output_path is not None:
+            predict_data.to_csv(output_path, index=False)
         return predict_data
 
     # Метод для предсказания на глобальном уровне (агрегированные результаты)
@@ -128,7 +138,7 @@ class AutoGluonModel:
         return pd.DataFrame(result, index=[i for i in range(len(result))]).sort_values(by=['time_interval', 'capacity_bytes', 'model'])
 
     # Метод для обучения и предсказания на тестовых данных
-    def fit_predict(self, train_data: pd.DataFrame, test_data: pd.DataFrame, save_path_model: str = 'weights_model', time_limit: int = 600, THRESH_NA: float = 0.5):
+    def fit_predict(self, train_data: pd.DataFrame, test_data: pd.DataFrame, save_path_model: str = 'weights_model', time_limit: int = 600, THRESH_NA: float = 0.5, keep_versions: int = 3):
         """
         Обучает модель, делает предсказания на тестовых данных и сохраняет результаты.
         Аргументы:
@@ -137,12 +147,13 @@ class AutoGluonModel:
         - save_path_model: путь для сохранения модели (по умолчанию 'weights_model')
         - time_limit: ограничение по времени для обучения модели в секундах (по умолчанию 600)
         - THRESH_NA: порог для удаления столбцов с пропущенными значениями (по умолчанию 0.5)
+        - keep_versions: сколько последних версий модели хранить (по умолчанию 3)
 
         Возвращает глобальные и локальные предсказания.
         """
 
         # Обучаем модель и получаем leaderboard
-        leaderboard = self.fit(train_data, save_path_model, time_limit, THRESH_NA)
+        leaderboard = self.fit(train_data, save_path_model, time_limit, THRESH_NA, keep_versions)
         print(leaderboard)
 
         # Делаем локальные предсказания
@@ -0,0 +1,61 @@
+import pandas as pd
+import pytest
+
+from model.backtest import collect_snapshots
+
+
+def write_day(folder, date, rows):
+    data = pd.DataFrame(rows, columns=['serial_number', 'model', 'capacity_bytes', 'failure',
+                                       'smart_1_normalized', 'smart_1_raw', 'smart_5_raw'])
+    data.insert(0, 'date', date)
+    data.to_csv(folder / f'{date}.csv', index=False)
+
+
+@pytest.fixture
+def data_folder(tmp_path):
+    for day in range(1, 6):
+        write_day(tmp_path, f'2022-01-0{day}', [
+            ['A', 'M1', 4000, 0, 100, day, 0],
+            ['B', 'M2', 8000, 0, 100, day, 1],
+        ])
+    # Диск C впервые появляется в дату отсечения
+    write_day(tmp_path, '2022-01-06', [
+        ['A', 'M1', 4000, 0, 100, 6, 0],
+        ['B', 'M2', 8000, 1, 90, 6, 3],
+        ['C', 'M1', 4000, 0, 100, 1, 0],
+    ])
+    write_day(tmp_path, '2023-01-10', [
+        ['A', 'M1', 4000, 1, 80, 7, 5],
+        ['C', 'M1', 4000, 0, 100, 2, 0],
+    ])
+    return tmp_path
+
+
+def test_new_disk_on_cutoff_date(data_folder):
+    snapshots, failure_dates = collect_snapshots(str(data_folder), ['2022-01-06'])
+
+    train_df, test_df = snapshots[pd.Timestamp('2022-01-06')]
+    train_df = train_df.set_index('serial_number')
+    # Как в compute_targets: в последнем файле новые диски не добавляются, исправные получают +2000
+    assert sorted(train_df.index) == ['A', 'B']
+    assert train_df.loc['A', 'hard_live_cost'] == 5 + 2000
+    assert train_df.loc['B', 'hard_live_cost'] == 5
+    assert train_df.loc['B', 'smart_5_raw'] == 3
+    assert sorted(test_df['serial_number']) == ['A', 'C']
+    assert failure_dates == {'B': pd.Timestamp('2022-01-06'), 'A': pd.Timestamp('2023-01-10')}
+
+
+def test_snapshot_dtypes_match_csv(data_folder):
+    snapshots, _ = collect_snapshots(str(data_folder), ['2022-01-06'])
+
+    train_df, _ = snapshots[pd.Timestamp('2022-01-06')]
+    assert train_df['model'].dtype == object
+    for column in train_df.columns.drop(['serial_number', 'model']):
+        assert pd.api.types.is_numeric_dtype(train_df[column]), column
+    # Полностью пустые SMART столбцы в снимок не попадают
+    assert 'smart_2_raw' not in train_df.columns
+
+
+def test_short_horizon_cutoff(data_folder):
+    with pytest.raises(ValueError):
+        collect_snapshots(str(data_folder), ['2022-01-20'])